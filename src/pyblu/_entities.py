@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Status:
     etag: str
     """Cursor for long polling requests. Can be passed to next status call."""
@@ -60,7 +60,7 @@ class Status:
     Seems to be present for radio stations and to be the same as the url from the matching preset(for Radio Stations)."""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PairedPlayer:
     ip: str
     """IP address of the player"""
@@ -68,7 +68,7 @@ class PairedPlayer:
     """Port of the player"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SyncStatus:
     etag: str
     """Cursor for long polling requests. Can be passed to next sync_status call."""
@@ -117,7 +117,7 @@ class SyncStatus:
     """Volume level with a range of 0-100. -1 means fixed volume."""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Volume:
     volume: int
     """Volume level with a range of 0-100"""
@@ -127,7 +127,7 @@ class Volume:
     """Mute status"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlayQueue:
     id: str
     """Unique id for the current play queue state. Changes whenever the play queue changes."""
@@ -139,7 +139,7 @@ class PlayQueue:
     """Number of tracks in the play queue"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Preset:
     name: str
     """Name of the preset"""
@@ -153,7 +153,7 @@ class Preset:
     """Volume level with a range of 0-100. None means the volume is not set."""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Input:
     id: str
     """Unique id of the input"""
@@ -1,145 +1,156 @@
-from typing import Any, TypeAlias, TypeVar, Callable
+from typing import TypeAlias, TypeVar, Callable
+from urllib.parse import unquote
 
-from pyblu._entities import PairedPlayer, SyncStatus, Status, Volume, PlayQueue, Preset
+from lxml import etree
+
+from pyblu._entities import PairedPlayer, SyncStatus, Status, Volume, PlayQueue, Preset, Input
 
 # pylint: disable=invalid-name
 T: TypeAlias = TypeVar("T")
+# pylint: disable=protected-access
+Element: TypeAlias = etree._Element
 
 
-def chained_get(data: dict[str, Any], *keys, _map: Callable[[str], T] = lambda x: x, default: T | None = None) -> T | None:
-    """Get a value from a nested dictionary.
-    If the value is not found, return the default value.
+def map_optional(value: str | None, _map: Callable[[str], T] | None = None, default: T | None = None) -> T | None:
+    """Map a value read from the XML response.
+    If the value is missing or empty, return the default value.
     Map the value to a different type using the _map function.
     """
-    local_data = data
-    for key in keys:
-        local_data = local_data.get(key)
-        if not local_data:
-            return default
+    if not value:
+        return default
+    if _map is None:
+        return value
+
+    return _map(value)
 
-    return _map(local_data)
 
+def parse_slave_list(slave_elements: list[Element]) -> list[PairedPlayer] | None:
+    if not slave_elements:
+        return None
 
-def parse_slave_list(slaves_raw: list[dict[str, str]]) -> list[PairedPlayer] | None:
-    match slaves_raw:
-        case {"@id": ip, "@port": port}:
-            return [PairedPlayer(ip=ip, port=int(port))]
-        case [*slaves_raw]:
-            return [PairedPlayer(ip=slave["@id"], port=int(slave["@port"])) for slave in slaves_raw]
-        case _:
-            return None
+    return [PairedPlayer(ip=x.get("id"), port=int(x.get("port"))) for x in slave_elements]
 
 
-def parse_sync_status(response_dict: dict[str, Any]) -> SyncStatus:
-    master_ip = chained_get(response_dict, "SyncStatus", "master", "#text")
-    master_port = chained_get(response_dict, "SyncStatus", "master", "@port")
-    master = PairedPlayer(ip=master_ip, port=int(master_port)) if master_ip and master_port else None
+def parse_sync_status(root: Element) -> SyncStatus:
+    master_element = root.find("master")
+    master = None
+    if master_element is not None and master_element.text and master_element.get("port"):
+        master = PairedPlayer(ip=master_element.text, port=int(master_element.get("port")))
 
-    slaves_raw = chained_get(response_dict, "SyncStatus", "slave")
-    slaves = parse_slave_list(slaves_raw)
+    slaves = parse_slave_list(root.findall("slave"))
 
     sync_status = SyncStatus(
-        etag=chained_get(response_dict, "SyncStatus", "@etag"),
-        id=chained_get(response_dict, "SyncStatus", "@id"),
-        mac=chained_get(response_dict, "SyncStatus", "@mac"),
-        name=chained_get(response_dict, "SyncStatus", "@name"),
-        image=chained_get(response_dict, "SyncStatus", "@icon"),
-        initialized=chained_get(response_dict, "SyncStatus", "@initialized") == "true",
-        group=chained_get(response_dict, "SyncStatus", "@group"),
+        etag=map_optional(root.get("etag")),
+        id=map_optional(root.get("id")),
+        mac=map_optional(root.get("mac")),
+        name=map_optional(root.get("name")),
+        image=map_optional(root.get("icon")),
+        initialized=root.get("initialized") == "true",
+        group=map_optional(root.get("group")),
         master=master,
         slaves=slaves,
-        zone=chained_get(response_dict, "SyncStatus", "@zone"),
-        zone_master=chained_get(response_dict, "SyncStatus", "@zoneMaster") == "true",
-        zone_slave=chained_get(response_dict, "SyncStatus", "@zoneSlave") == "true",
-        brand=chained_get(response_dict, "SyncStatus", "@brand"),
-        model=chained_get(response_dict, "SyncStatus", "@model"),
-        model_name=chained_get(response_dict, "SyncStatus", "@modelName"),
-        mute_volume_db=chained_get(response_dict, "SyncStatus", "@muteDb", _map=float),
-        mute_volume=chained_get(response_dict, "SyncStatus", "@muteVolume", _map=int),
-        volume_db=chained_get(response_dict, "SyncStatus", "@db", _map=float),
-        volume=chained_get(response_dict, "SyncStatus", "@volume", _map=int),
+        zone=map_optional(root.get("zone")),
+        zone_master=root.get("zoneMaster") == "true",
+        zone_slave=root.get("zoneSlave") == "true",
+        brand=map_optional(root.get("brand")),
+        model=map_optional(root.get("model")),
+        model_name=map_optional(root.get("modelName")),
+        mute_volume_db=map_optional(root.get("muteDb"), float),
+        mute_volume=map_optional(root.get("muteVolume"), int),
+        volume_db=map_optional(root.get("db"), float),
+        volume=map_optional(root.get("volume"), int),
     )
 
     return sync_status
 
 
-def parse_status(response_dict: dict[str, Any]) -> Status:
-    name = chained_get(response_dict, "status", "name")
+def parse_status(root: Element) -> Status:
+    # Single pass over the children. findtext would scan them again for every field.
+    children = {x.tag: x.text for x in root}
+
+    name = map_optional(children.get("name"))
     if name is None:
-        name = chained_get(response_dict, "status", "title1")
-    artist = chained_get(response_dict, "status", "artist")
+        name = map_optional(children.get("title1"))
+    artist = map_optional(children.get("artist"))
     if artist is None:
-        artist = chained_get(response_dict, "status", "title2")
-    album = chained_get(response_dict, "status", "album")
+        artist = map_optional(children.get("title2"))
+    album = map_optional(children.get("album"))
     if album is None:
-        album = chained_get(response_dict, "status", "title3")
+        album = map_optional(children.get("title3"))
 
     status = Status(
-        etag=chained_get(response_dict, "status", "@etag"),
-        input_id=chained_get(response_dict, "status", "inputId"),
-        service=chained_get(response_dict, "status", "service"),
-        state=chained_get(response_dict, "status", "state"),
-        shuffle=chained_get(response_dict, "status", "shuffle") == "1",
+        etag=map_optional(root.get("etag")),
+        input_id=map_optional(children.get("inputId")),
+        service=map_optional(children.get("service")),
+        state=map_optional(children.get("state")),
+        shuffle=children.get("shuffle") == "1",
         album=album,
         artist=artist,
         name=name,
-        image=chained_get(response_dict, "status", "image"),
-        volume=chained_get(response_dict, "status", "volume", _map=int),
-        volume_db=chained_get(response_dict, "status", "db", _map=float),
-        mute=chained_get(response_dict, "status", "mute") == "1",
-        mute_volume=chained_get(response_dict, "status", "muteVolume", _map=int),
-        mute_volume_db=chained_get(response_dict, "status", "muteDb", _map=float),
-        seconds=chained_get(response_dict, "status", "secs", _map=int),
-        total_seconds=chained_get(response_dict, "status", "totlen", _map=float),
-        can_seek=chained_get(response_dict, "status", "canSeek") == "1",
-        sleep=chained_get(response_dict, "status", "sleep", _map=int, default=0),
-        group_name=chained_get(response_dict, "status", "groupName"),
-        group_volume=chained_get(response_dict, "status", "groupVolume", _map=int),
-        indexing=chained_get(response_dict, "status", "indexing") == "1",
-        stream_url=chained_get(response_dict, "status", "streamUrl"),
+        image=map_optional(children.get("image")),
+        volume=map_optional(children.get("volume"), int),
+        volume_db=map_optional(children.get("db"), float),
+        mute=children.get("mute") == "1",
+        mute_volume=map_optional(children.get("muteVolume"), int),
+        mute_volume_db=map_optional(children.get("muteDb"), float),
+        seconds=map_optional(children.get("secs"), int),
+        total_seconds=map_optional(children.get("totlen"), float),
+        can_seek=children.get("canSeek") == "1",
+        sleep=map_optional(children.get("sleep"), int, default=0),
+        group_name=map_optional(children.get("groupName")),
+        group_volume=map_optional(children.get("groupVolume"), int),
+        indexing=children.get("indexing") == "1",
+        stream_url=map_optional(children.get("streamUrl")),
     )
 
     return status
 
 
-def parse_volume(response_dict: dict[str, Any]) -> Volume:
+def parse_volume(root: Element) -> Volume:
     volume = Volume(
-        volume=chained_get(response_dict, "volume", "#text", _map=int),
-        db=chained_get(response_dict, "volume", "@db", _map=float),
-        mute=chained_get(response_dict, "volume", "@mute") == "1",
+        volume=map_optional(root.text, int),
+        db=map_optional(root.get("db"), float),
+        mute=root.get("mute") == "1",
     )
 
     return volume
 
 
-def parse_play_queue(response_dict: dict[str, Any]) -> PlayQueue:
+def parse_play_queue(root: Element) -> PlayQueue:
     play_queue = PlayQueue(
-        id=chained_get(response_dict, "playlist", "@id"),
-        modified=chained_get(response_dict, "playlist", "@modified") == "1",
-        length=chained_get(response_dict, "playlist", "@length", _map=int),
-        shuffle=chained_get(response_dict, "playlist", "@shuffle") == "1",
+        id=map_optional(root.get("id")),
+        modified=root.get("modified") == "1",
+        length=map_optional(root.get("length"), int),
+        shuffle=root.get("shuffle") == "1",
     )
 
     return play_queue
 
 
-def parse_presets(response_dict: dict[str, Any]) -> list[Preset]:
-    presets_raw = chained_get(response_dict, "presets", "preset")
-    if not presets_raw:
-        return []
-
-    if not isinstance(presets_raw, list):
-        presets_raw = [presets_raw]
-
+def parse_presets(root: Element) -> list[Preset]:
     presets = [
         Preset(
-            name=chained_get(x, "@name"),
-            id=chained_get(x, "@id", _map=int),
-            url=chained_get(x, "@url"),
-            image=chained_get(x, "@image"),
-            volume=chained_get(x, "@volume", _map=int),
+            name=map_optional(x.get("name")),
+            id=map_optional(x.get("id"), int),
+            url=map_optional(x.get("url")),
+            image=map_optional(x.get("image")),
+            volume=map_optional(x.get("volume"), int),
         )
-        for x in presets_raw
+        for x in root.findall("preset")
     ]
 
     return presets
+
+
+def parse_inputs(root: Element) -> list[Input]:
+    inputs = [
+        Input(
+            id=map_optional(x.get("id")),
+            text=map_optional(x.get("text")),
+            image=map_optional(x.get("image")),
+            url=map_optional(x.get("URL"), unquote),
+        )
+        for x in root.findall("item")
+    ]
+
+    return inputs
@@ -1,10 +1,42 @@
-from urllib.parse import unquote
+import asyncio
+import functools
+import time
+from typing import Any, AsyncIterator
 
 import aiohttp
-import xmltodict
+from lxml import etree
+from yarl import URL
 
 from pyblu._entities import Status, Volume, SyncStatus, PairedPlayer, PlayQueue, Preset, Input
-from pyblu._parse import parse_slave_list, parse_sync_status, parse_status, parse_volume, chained_get, parse_play_queue, parse_presets
+from pyblu._parse import Element, parse_slave_list, parse_sync_status, parse_status, parse_volume, map_optional, parse_play_queue, parse_presets, parse_inputs
+
+# Limit of requests in flight per player, so a small device is not flooded with connections
+_MAX_CONCURRENT_REQUESTS = 10
+_DNS_CACHE_TTL = 300
+# Inputs rarely change, so they are cached for this many seconds
+_INPUTS_CACHE_TTL = 30.0
+# Shared parser, so parser setup is not repeated for every response. Entities from a DTD are never resolved.
+# IDs are not collected, because no response is looked up by ID.
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, remove_blank_text=True, collect_ids=False)
+
+
+def _slaves_params(slaves: list[PairedPlayer]) -> dict[str, str]:
+    ips = []
+    ports = []
+    for slave in slaves:
+        ips.append(slave.ip)
+        ports.append(str(slave.port))
+
+    return {
+        "slaves": ",".join(ips),
+        "ports": ",".join(ports),
+    }
+
+
+@functools.lru_cache(maxsize=16)
+def _client_timeout(total: int) -> aiohttp.ClientTimeout:
+    # Only a few distinct timeouts are used, so the ClientTimeout objects are shared instead of created by aiohttp for every request
+    return aiohttp.ClientTimeout(total=total)
 
 
 class Player:
@@ -12,7 +44,8 @@ class Player:
         """Client for a BluOS player. Uses the HTTP API of the BluOS players to control it.
 
         The passed sessions will not be closed when the player is closed and has to be closed by the caller.
-        If no session is passed, a new session will be created and closed when the player is closed.
+        If no session is passed, a new session will be created on the first request and closed when the player is closed.
+        Pass a shared session when creating many players or creating players often, so connections are reused between them.
 
         *Player* is an async context manager and can be used with *async with*.
 
@@ -25,19 +58,30 @@ class Player:
         """
         self.base_url = f"http://{host}:{port}"
         self._default_timeout = default_timeout
-        if session:
-            self._session_owned = False
-            self._session = session
-        else:
-            self._session_owned = True
-            self._session = aiohttp.ClientSession()
+        self._request_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        self._last_status: tuple[bytes, Status] | None = None
+        self._last_sync_status: tuple[bytes, SyncStatus] | None = None
+        self._urls: dict[str, URL] = {}
+        self._inputs_cache: tuple[float, list[Input]] | None = None
+        # An owned session is created on the first request, so a player can be created outside of a running event loop
+        self._session_owned = session is None
+        self._session = session
 
     @property
     def default_timeout(self) -> int:
         return self._default_timeout
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            # Players are usually addressed by a local hostname, which is slow to resolve and rarely changes
+            connector = aiohttp.TCPConnector(ttl_dns_cache=_DNS_CACHE_TTL)
+            # The BluOS API does not use cookies
+            self._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+        return self._session
+
     async def close(self):
-        if self._session_owned:
+        if self._session_owned and self._session is not None:
             await self._session.close()
 
     async def __aenter__(self):
@@ -46,6 +90,22 @@ class Player:
     async def __aexit__(self, *args):
         await self.close()
 
+    async def _get(self, path: str, params: dict[str, Any] | None = None, timeout: int | None = None) -> bytes:
+        timeout = timeout if timeout is not None else self.default_timeout
+
+        # Parsed URLs are cached, so aiohttp does not parse the same URL string again for every request
+        url = self._urls.get(path)
+        if url is None:
+            url = self._urls[path] = URL(f"{self.base_url}{path}")
+
+        async with self._request_semaphore, self._get_session().get(url, params=params, timeout=_client_timeout(timeout)) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def _get_xml(self, path: str, params: dict[str, Any] | None = None, timeout: int | None = None) -> Element:
+        response_data = await self._get(path, params, timeout=timeout)
+        return etree.fromstring(response_data, parser=_XML_PARSER)
+
     async def status(self, etag: str | None = None, poll_timeout: int = 30, timeout: int | None = None) -> Status:
         """Get the current status of the player.
 
@@ -70,14 +130,17 @@ class Player:
             params["etag"] = etag
             params["timeout"] = poll_timeout
 
-        async with self._session.get(f"{self.base_url}/Status", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        response_data = await self._get("/Status", params, timeout=timeout)
 
-            status = parse_status(response_dict)
+        # The etag does not change while the playback position advances, so only an identical response can reuse the last parsed status
+        if self._last_status is not None and self._last_status[0] == response_data:
+            return self._last_status[1]
 
-            return status
+        root = etree.fromstring(response_data, parser=_XML_PARSER)
+        status = parse_status(root)
+        self._last_status = (response_data, status)
+
+        return status
 
     async def sync_status(self, etag: str | None = None, poll_timeout: int = 30, timeout: int | None = None) -> SyncStatus:
         """Get the SyncStatus of the player.
@@ -103,16 +166,62 @@ class Player:
             params["etag"] = etag
             params["timeout"] = poll_timeout
 
-        async with self._session.get(f"{self.base_url}/SyncStatus", params=params) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        response_data = await self._get("/SyncStatus", params, timeout=timeout)
+
+        # Only an identical response can reuse the last parsed sync status, the etag alone does not cover every attribute
+        if self._last_sync_status is not None and self._last_sync_status[0] == response_data:
+            return self._last_sync_status[1]
 
-            sync_status = parse_sync_status(response_dict)
+        root = etree.fromstring(response_data, parser=_XML_PARSER)
+        sync_status = parse_sync_status(root)
+        self._last_sync_status = (response_data, sync_status)
 
-            return sync_status
+        return sync_status
+
+    async def snapshot(self, timeout: int | None = None) -> tuple[Status, SyncStatus]:
+        """Get the Status and SyncStatus of the player.
+
+        Both requests are sent concurrently, so this is faster than calling *status* and *sync_status* one after another.
+
+        :param timeout: The timeout in seconds for the requests. This overrides the default timeout.
+
+        :return: The current status and the SyncStatus of the player.
+        """
+        status, sync_status = await asyncio.gather(
+            self.status(timeout=timeout),
+            self.sync_status(timeout=timeout),
+        )
 
-    async def volume(self, level: int = None, mute: bool = None, tell_slaves: bool = None, timeout: int | None = None) -> Volume:
+        return status, sync_status
+
+    async def stream_status(self, poll_timeout: int = 30, timeout: int = 35) -> AsyncIterator[Status]:
+        """Stream the status of the player using long polling.
+
+        Yields the current status first and then every changed status. Polls that return an unchanged response are not yielded.
+        The iteration only ends when a request fails. Raises a ValueError if the player returns no etag, because long polling is not possible without it.
+
+        :param poll_timeout: The timeout in seconds for long polling. Has to be smaller than timeout.
+        :param timeout: The timeout in seconds for each request. Has to be larger than poll_timeout.
+
+        :return: An async iterator over the status of the player.
+        """
+        if poll_timeout >= timeout:
+            raise ValueError("poll_timeout has to be smaller than timeout")
+
+        status = await self.status(timeout=timeout)
+        yield status
+
+        while True:
+            if status.etag is None:
+                raise ValueError("Status has no etag, long polling is not possible")
+
+            next_status = await self.status(etag=status.etag, poll_timeout=poll_timeout, timeout=timeout)
+            # Compared by value, because other status() calls on this player replace the cached status
+            if next_status != status:
+                status = next_status
+                yield status
+
+    async def volume(self, level: int | None = None, mute: bool | None = None, tell_slaves: bool | None = None, timeout: int | None = None) -> Volume:
         """Get or set the volume of the player.
         Call without parameters to get the current volume. Call with parameters to set the volume.
 
@@ -123,8 +232,6 @@ class Player:
 
         :return: The current volume of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {}
         if level is not None:
             params["level"] = level
@@ -133,16 +240,13 @@ class Player:
         if tell_slaves is not None:
             params["tell_slaves"] = "1" if tell_slaves else "0"
 
-        async with self._session.get(f"{self.base_url}/Volume", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Volume", params, timeout=timeout)
 
-            volume = parse_volume(response_dict)
+        volume = parse_volume(root)
 
-            return volume
+        return volume
 
-    async def play(self, seek: int = None, timeout: int | None = None) -> str:
+    async def play(self, seek: int | None = None, timeout: int | None = None) -> str:
         """Start playing the current track. Can also be used to seek within the current track.
         Works only when paused, not when stopped.
 
@@ -151,18 +255,13 @@ class Player:
 
         :return: The playback state after command execution.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {}
         if seek is not None:
             params["seek"] = seek
 
-        async with self._session.get(f"{self.base_url}/Play", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Play", params, timeout=timeout)
 
-            return chained_get(response_dict, "state")
+        return root.text
 
     async def play_url(self, url: str, timeout: int | None = None) -> str:
         """Start playing a track from a URL. Can also be used to select inputs. See *inputs* for available inputs.
@@ -172,19 +271,14 @@ class Player:
 
         :return: The playback state after command execution.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {
             "url": url,
         }
-        async with self._session.get(f"{self.base_url}/Play", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Play", params, timeout=timeout)
 
-            return chained_get(response_dict, "state")
+        return root.text
 
-    async def pause(self, toggle: bool = None, timeout: int | None = None) -> str:
+    async def pause(self, toggle: bool | None = None, timeout: int | None = None) -> str:
         """Pause the current track. **toggle** can be used to toggle between playing and pause.
 
         :param toggle: Toggle between playing and pause.
@@ -192,18 +286,13 @@ class Player:
 
         :return: The playback state after command execution.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {}
-        if toggle is not None:
+        if toggle:
             params["toggle"] = "1"
 
-        async with self._session.get(f"{self.base_url}/Pause", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Pause", params, timeout=timeout)
 
-            return chained_get(response_dict, "state")
+        return root.text
 
     async def stop(self, timeout: int | None = None) -> str:
         """Stop the current track. Stopped playback cannot be resumed.
@@ -212,33 +301,23 @@ class Player:
 
         :return: The playback state after command execution.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
-        async with self._session.get(f"{self.base_url}/Stop", timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Stop", timeout=timeout)
 
-            return chained_get(response_dict, "state")
+        return root.text
 
     async def skip(self, timeout: int | None = None) -> None:
         """Skip to the next track.
 
         :param timeout: The timeout in seconds for the request. This overrides the default timeout.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-        async with self._session.get(f"{self.base_url}/Skip", timeout=timeout) as response:
-            response.raise_for_status()
+        await self._get("/Skip", timeout=timeout)
 
     async def back(self, timeout: int | None = None) -> None:
         """Go back to the previous track.
 
         :param timeout: The timeout in seconds for the request. This overrides the default timeout.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
-        async with self._session.get(f"{self.base_url}/Back", timeout=timeout) as response:
-            response.raise_for_status()
+        await self._get("/Back", timeout=timeout)
 
     async def add_slave(self, ip: str, port: int = 11000, timeout: int | None = None) -> list[PairedPlayer]:
         """Add a secondary player to the current player as a slave.
@@ -250,21 +329,15 @@ class Player:
 
         :return: The list of slaves of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {
             "slave": ip,
             "port": port,
         }
-        async with self._session.get(f"{self.base_url}/AddSlave", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/AddSlave", params, timeout=timeout)
 
-            slaves_raw = chained_get(response_dict, "addSlave", "slave")
-            slaves = parse_slave_list(slaves_raw)
+        slaves = parse_slave_list(root.findall("slave"))
 
-            return slaves
+        return slaves
 
     async def add_slaves(self, slaves: list[PairedPlayer], timeout: int | None = None) -> list[PairedPlayer]:
         """Add a list of secondary players to the current player as slaves.
@@ -277,21 +350,12 @@ class Player:
 
         :return: The list of slaves of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
-        params = {
-            "slaves": ",".join(x.ip for x in slaves),
-            "ports": ",".join(str(x.port) for x in slaves),
-        }
-        async with self._session.get(f"{self.base_url}/AddSlave", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        params = _slaves_params(slaves)
+        root = await self._get_xml("/AddSlave", params, timeout=timeout)
 
-            slaves_raw = chained_get(response_dict, "addSlave", "slave")
-            slaves = parse_slave_list(slaves_raw)
+        slaves = parse_slave_list(root.findall("slave"))
 
-            return slaves
+        return slaves
 
     async def remove_slave(self, ip: str, port: int = 11000, timeout: int | None = None) -> SyncStatus:
         """Remove a secondary player from the group.
@@ -302,20 +366,15 @@ class Player:
 
         :return: The SyncStatus of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {
             "slave": ip,
             "port": port,
         }
-        async with self._session.get(f"{self.base_url}/RemoveSlave", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/RemoveSlave", params, timeout=timeout)
 
-            sync_status = parse_sync_status(response_dict)
+        sync_status = parse_sync_status(root)
 
-            return sync_status
+        return sync_status
 
     async def remove_slaves(self, slaves: list[PairedPlayer], timeout: int | None = None) -> SyncStatus:
         """Remove a list of secondary players from the group.
@@ -327,20 +386,12 @@ class Player:
 
         :return: The SyncStatus of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
-        params = {
-            "slaves": ",".join(x.ip for x in slaves),
-            "ports": ",".join(str(x.port) for x in slaves),
-        }
-        async with self._session.get(f"{self.base_url}/RemoveSlave", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        params = _slaves_params(slaves)
+        root = await self._get_xml("/RemoveSlave", params, timeout=timeout)
 
-            sync_status = parse_sync_status(response_dict)
+        sync_status = parse_sync_status(root)
 
-            return sync_status
+        return sync_status
 
     async def shuffle(self, shuffle: bool, timeout: int | None = None) -> PlayQueue:
         """Set shuffle on current play queue.
@@ -350,19 +401,14 @@ class Player:
 
         :return: The current play queue.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {
             "shuffle": "1" if shuffle else "0",
         }
-        async with self._session.get(f"{self.base_url}/Shuffle", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Shuffle", params, timeout=timeout)
 
-            play_queue = parse_play_queue(response_dict)
+        play_queue = parse_play_queue(root)
 
-            return play_queue
+        return play_queue
 
     async def clear(self, timeout: int | None = None) -> PlayQueue:
         """Clear the play queue.
@@ -371,16 +417,11 @@ class Player:
 
         :return: The current play queue.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
+        root = await self._get_xml("/Clear", timeout=timeout)
 
-        async with self._session.get(f"{self.base_url}/Clear", timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
-
-            play_queue = parse_play_queue(response_dict)
+        play_queue = parse_play_queue(root)
 
-            return play_queue
+        return play_queue
 
     async def sleep_timer(self, timeout: int | None = None) -> int:
         """Set sleep timer. Time steps are 15, 30, 45, 60, 90 minutes. Each call goes to next step.
@@ -390,18 +431,11 @@ class Player:
 
         :return: The current sleep timer in minutes. 0 if no sleep timer is set.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
-        async with self._session.get(f"{self.base_url}/Sleep", timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Sleep", timeout=timeout)
 
-            sleep_timer = chained_get(response_dict, "sleep", _map=int)
-            if not sleep_timer:
-                sleep_timer = 0
+        sleep_timer = map_optional(root.text, int, default=0)
 
-            return sleep_timer
+        return sleep_timer
 
     async def presets(self, timeout: int | None = None) -> list[Preset]:
         """Get the list of presets of the player.
@@ -410,16 +444,11 @@ class Player:
 
         :return: The list of presets of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
-        async with self._session.get(f"{self.base_url}/Presets", timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
+        root = await self._get_xml("/Presets", timeout=timeout)
 
-            presets = parse_presets(response_dict)
+        presets = parse_presets(root)
 
-            return presets
+        return presets
 
     async def load_preset(self, preset_id: int, timeout: int | None = None) -> None:
         """Load a preset by ID.
@@ -428,42 +457,29 @@ class Player:
 
         :param preset_id: The ID of the preset to load.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
-
         params = {
             "id": preset_id,
         }
-        async with self._session.get(f"{self.base_url}/Preset", params=params, timeout=timeout) as response:
-            response.raise_for_status()
+        await self._get("/Preset", params, timeout=timeout)
 
     async def inputs(self, timeout: int | None = None) -> list[Input]:
         """List all available inputs.
 
+        The list is cached for *_INPUTS_CACHE_TTL* seconds, because the inputs of a player rarely change.
+
         :param timeout: The timeout in seconds for the request. This overrides the default timeout.
 
         :return: The list of inputss of the player.
         """
-        timeout = timeout if timeout is not None else self.default_timeout
+        if self._inputs_cache is not None:
+            cached_at, cached_inputs = self._inputs_cache
+            if time.monotonic() - cached_at < _INPUTS_CACHE_TTL:
+                return list(cached_inputs)
 
         params = {"service": "Capture"}
-        async with self._session.get(f"{self.base_url}/RadioBrowse", params=params, timeout=timeout) as response:
-            response.raise_for_status()
-            response_data = await response.text()
-            response_dict = xmltodict.parse(response_data)
-
-            inputs_raw = chained_get(response_dict, "radiotime", "item")
-
-            if not isinstance(inputs_raw, list):
-                inputs_raw = [inputs_raw]
+        root = await self._get_xml("/RadioBrowse", params, timeout=timeout)
 
-            inputs = [
-                Input(
-                    id=chained_get(x, "@id"),
-                    text=chained_get(x, "@text"),
-                    image=chained_get(x, "@image"),
-                    url=chained_get(x, "@URL", _map=unquote),
-                )
-                for x in inputs_raw
-            ]
+        inputs = parse_inputs(root)
+        self._inputs_cache = (time.monotonic(), inputs)
 
-            return inputs
+        return list(inputs)
@@ -1,22 +1,21 @@
-import xmltodict
+from lxml import etree
 
 from pyblu import PairedPlayer
 from pyblu._parse import parse_slave_list, parse_status
 
 
 def test_parse_slave_list_no_slave():
-    slaves_raw = {}
+    slaves_raw = []
     slaves = parse_slave_list(slaves_raw)
     assert slaves is None
 
 
 def test_parse_slave_list_single_element():
-    slaves_raw = [
-        {
-            "@id": "1.1.1.1",
-            "@port": "11000",
-        }
-    ]
+    slaves_raw = etree.fromstring(
+        """<addSlave>
+            <slave id="1.1.1.1" port="11000"/>
+        </addSlave>"""
+    ).findall("slave")
 
     slaves = parse_slave_list(slaves_raw)
 
@@ -26,16 +25,12 @@ def test_parse_slave_list_single_element():
 
 
 def test_parse_slave_list_multiple_elements():
-    slaves_raw = [
-        {
-            "@id": "1.1.1.1",
-            "@port": "11000",
-        },
-        {
-            "@id": "2.2.2.2",
-            "@port": "11000",
-        },
-    ]
+    slaves_raw = etree.fromstring(
+        """<addSlave>
+            <slave id="1.1.1.1" port="11000"/>
+            <slave id="2.2.2.2" port="11000"/>
+        </addSlave>"""
+    ).findall("slave")
 
     slaves = parse_slave_list(slaves_raw)
 
@@ -50,9 +45,9 @@ def test_parse_status_default_sleep():
                 <sleep/>
             </status>"""
 
-    response_dict = xmltodict.parse(data)
+    root = etree.fromstring(data)
 
-    status = parse_status(response_dict)
+    status = parse_status(root)
 
     assert status.sleep == 0
 
@@ -64,9 +59,9 @@ def test_parse_status_name_album_artist():
                 <artist>Artist Name</artist>
             </status>"""
 
-    response_dict = xmltodict.parse(data)
+    root = etree.fromstring(data)
 
-    status = parse_status(response_dict)
+    status = parse_status(root)
 
     assert status.name == "Track Name"
     assert status.album == "Album Name"
@@ -80,10 +75,26 @@ def test_parse_status_title1_title2_title3():
                 <title3>Album Name</title3>
             </status>"""
 
-    response_dict = xmltodict.parse(data)
+    root = etree.fromstring(data)
 
-    status = parse_status(response_dict)
+    status = parse_status(root)
 
     assert status.name == "Track Name"
     assert status.album == "Album Name"
     assert status.artist == "Artist Name"
+
+
+def test_parse_status_zero_values():
+    data = """<status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+                <volume>0</volume>
+                <secs>0</secs>
+                <sleep>0</sleep>
+            </status>"""
+
+    root = etree.fromstring(data)
+
+    status = parse_status(root)
+
+    assert status.volume == 0
+    assert status.seconds == 0
+    assert status.sleep == 0
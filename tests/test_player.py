@@ -1,12 +1,25 @@
+import warnings
 from urllib.parse import quote
 
 from aioresponses import aioresponses
 import pytest
+from yarl import URL
 
 from pyblu import Player, PairedPlayer
 from pyblu._entities import Preset, Input
 
 
+def test_create_outside_event_loop():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        Player("node")
+
+
+async def test_close_without_request():
+    async with Player("node"):
+        pass
+
+
 async def test_skip():
     with aioresponses() as mocked:
         mocked.get("http://node:11000/Skip", status=200)
@@ -45,6 +58,26 @@ async def test_pause():
         mocked.assert_called_once()
 
 
+async def test_pause_toggle():
+    with aioresponses() as mocked:
+        mocked.get("http://node:11000/Pause?toggle=1", status=200, body="<state>playing</state>")
+        async with Player("node") as client:
+            state = await client.pause(toggle=True)
+
+        assert state == "playing"
+        mocked.assert_called_once()
+
+
+async def test_pause_no_toggle():
+    with aioresponses() as mocked:
+        mocked.get("http://node:11000/Pause", status=200, body="<state>paused</state>")
+        async with Player("node") as client:
+            state = await client.pause(toggle=False)
+
+        assert state == "paused"
+        mocked.assert_called_once()
+
+
 async def test_stop():
     with aioresponses() as mocked:
         mocked.get("http://node:11000/Stop", status=200, body="<state>stopped</state>")
@@ -81,6 +114,17 @@ async def test_volume_unmute():
         assert not volume.mute
 
 
+async def test_volume_level_zero():
+    with aioresponses() as mocked:
+        mocked.get("http://node:11000/Volume?level=0", status=200, body="<volume db='-80.0' mute='0'>0</volume>")
+        async with Player("node") as client:
+            volume = await client.volume(level=0)
+
+        mocked.assert_called_once()
+
+        assert volume.volume == 0
+
+
 async def test_status():
     with aioresponses() as mocked:
         mocked.get(
@@ -155,6 +199,67 @@ async def test_status():
         assert status.stream_url == "RadioParadise:/0:4"
 
 
+async def test_status_same_response_reuses_status():
+    with aioresponses() as mocked:
+        for _ in range(2):
+            mocked.get(
+                "http://node:11000/Status",
+                status=200,
+                body="""
+            <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+                <state>playing</state>
+            </status>
+            """,
+            )
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status etag="5e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>paused</state>
+        </status>
+        """,
+        )
+        async with Player("node") as client:
+            first = await client.status()
+            second = await client.status()
+            third = await client.status()
+
+        assert second is first
+        assert third.etag == "5e266c9fbfba6d13d1a4d6ff4bd2e1e6"
+        assert third.state == "paused"
+
+
+async def test_status_same_etag_changed_secs():
+    with aioresponses() as mocked:
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>playing</state>
+            <secs>10</secs>
+        </status>
+        """,
+        )
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>playing</state>
+            <secs>25</secs>
+        </status>
+        """,
+        )
+        async with Player("node") as client:
+            first = await client.status()
+            second = await client.status()
+
+        assert first.seconds == 10
+        assert second.seconds == 25
+
+
 async def test_status_timeout_missconfigured():
     async with Player("node") as client:
         with pytest.raises(ValueError, match="poll_timeout has to be smaller than timeout"):
@@ -245,6 +350,61 @@ async def test_sync_status_one_slave():
         ]
 
 
+async def test_sync_status_same_response_reuses_sync_status():
+    with aioresponses() as mocked:
+        for _ in range(2):
+            mocked.get(
+                "http://node:11000/SyncStatus",
+                status=200,
+                body="""
+            <SyncStatus etag="707" name="Node">
+            </SyncStatus>
+            """,
+            )
+        mocked.get(
+            "http://node:11000/SyncStatus",
+            status=200,
+            body="""
+        <SyncStatus etag="708" name="Renamed">
+        </SyncStatus>
+        """,
+        )
+        async with Player("node") as client:
+            first = await client.sync_status()
+            second = await client.sync_status()
+            third = await client.sync_status()
+
+        assert second is first
+        assert third.etag == "708"
+        assert third.name == "Renamed"
+
+
+async def test_sync_status_same_etag_changed_volume():
+    with aioresponses() as mocked:
+        mocked.get(
+            "http://node:11000/SyncStatus",
+            status=200,
+            body="""
+        <SyncStatus etag="707" name="Node" volume="10">
+        </SyncStatus>
+        """,
+        )
+        mocked.get(
+            "http://node:11000/SyncStatus",
+            status=200,
+            body="""
+        <SyncStatus etag="707" name="Node" volume="20">
+        </SyncStatus>
+        """,
+        )
+        async with Player("node") as client:
+            first = await client.sync_status()
+            second = await client.sync_status()
+
+        assert first.volume == 10
+        assert second.volume == 20
+
+
 async def test_sync_status_timeout_missconfigured():
     async with Player("node") as client:
         with pytest.raises(ValueError, match="poll_timeout has to be smaller than timeout"):
@@ -269,6 +429,139 @@ async def test_sync_status_long_polling():
         mocked.assert_called_once()
 
 
+async def test_stream_status():
+    with aioresponses() as mocked:
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>playing</state>
+        </status>
+        """,
+        )
+        mocked.get(
+            "http://node:11000/Status?etag=4e266c9fbfba6d13d1a4d6ff4bd2e1e6&timeout=30",
+            status=200,
+            body="""
+        <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>playing</state>
+        </status>
+        """,
+        )
+        mocked.get(
+            "http://node:11000/Status?etag=4e266c9fbfba6d13d1a4d6ff4bd2e1e6&timeout=30",
+            status=200,
+            body="""
+        <status etag="5e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>paused</state>
+        </status>
+        """,
+        )
+        async with Player("node") as client:
+            stream = client.stream_status()
+            first = await anext(stream)
+            second = await anext(stream)
+            await stream.aclose()
+
+        assert first.state == "playing"
+        assert second.etag == "5e266c9fbfba6d13d1a4d6ff4bd2e1e6"
+        assert second.state == "paused"
+
+
+async def test_stream_status_no_duplicate_after_status_call():
+    body = """
+        <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>playing</state>
+        </status>
+        """
+    with aioresponses() as mocked:
+        mocked.get("http://node:11000/Status", status=200, body=body)
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status etag="5e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>paused</state>
+        </status>
+        """,
+        )
+        mocked.get("http://node:11000/Status?etag=4e266c9fbfba6d13d1a4d6ff4bd2e1e6&timeout=30", status=200, body=body)
+        mocked.get(
+            "http://node:11000/Status?etag=4e266c9fbfba6d13d1a4d6ff4bd2e1e6&timeout=30",
+            status=200,
+            body="""
+        <status etag="6e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>stop</state>
+        </status>
+        """,
+        )
+        async with Player("node") as client:
+            stream = client.stream_status()
+            first = await anext(stream)
+            await client.status()
+            second = await anext(stream)
+            await stream.aclose()
+
+        assert first.state == "playing"
+        assert second.state == "stop"
+
+
+async def test_stream_status_timeout_missconfigured():
+    async with Player("node") as client:
+        with pytest.raises(ValueError, match="poll_timeout has to be smaller than timeout"):
+            await anext(client.stream_status(poll_timeout=30, timeout=30))
+
+
+async def test_stream_status_without_etag():
+    with aioresponses() as mocked:
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status>
+            <state>playing</state>
+        </status>
+        """,
+        )
+        async with Player("node") as client:
+            stream = client.stream_status()
+            first = await anext(stream)
+            with pytest.raises(ValueError, match="Status has no etag"):
+                await anext(stream)
+
+        mocked.assert_called_once()
+        assert first.state == "playing"
+
+
+async def test_snapshot():
+    with aioresponses() as mocked:
+        mocked.get(
+            "http://node:11000/Status",
+            status=200,
+            body="""
+        <status etag="4e266c9fbfba6d13d1a4d6ff4bd2e1e6">
+            <state>playing</state>
+        </status>
+        """,
+        )
+        mocked.get(
+            "http://node:11000/SyncStatus",
+            status=200,
+            body="""
+        <SyncStatus etag="707" name="Node">
+        </SyncStatus>
+        """,
+        )
+
+        async with Player("node") as client:
+            status, sync_status = await client.snapshot()
+
+        assert status.state == "playing"
+        assert sync_status.etag == "707"
+        assert sync_status.name == "Node"
+
+
 async def test_add_slave():
     with aioresponses() as mocked:
         mocked.get(
@@ -629,3 +922,45 @@ async def test_inputs_only_one():
         assert inputs == [
             Input(id="input3", text="Bluetooth", image="/images/BluetoothIcon.png", url="Capture:bluez:bluetooth"),
         ]
+
+
+async def test_inputs_cached():
+    with aioresponses() as mocked:
+        mocked.get(
+            "http://node:11000/RadioBrowse?service=Capture",
+            status=200,
+            body="""
+        <radiotime service="Capture">
+          <item typeIndex="bluetooth-1" playerName="Node" text="Bluetooth" inputType="bluetooth" id="input3" URL="Capture%3Abluez%3Abluetooth" image="/images/BluetoothIcon.png" type="audio"/>
+        </radiotime>
+        """,
+        )
+        async with Player("node") as client:
+            inputs = await client.inputs()
+            inputs_cached = await client.inputs()
+
+        mocked.assert_called_once()
+
+        assert inputs_cached == inputs
+
+
+async def test_inputs_cache_expires(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("pyblu._player.time.monotonic", lambda: now)
+    with aioresponses() as mocked:
+        for _ in range(2):
+            mocked.get(
+                "http://node:11000/RadioBrowse?service=Capture",
+                status=200,
+                body="""
+            <radiotime service="Capture">
+              <item typeIndex="bluetooth-1" playerName="Node" text="Bluetooth" inputType="bluetooth" id="input3" URL="Capture%3Abluez%3Abluetooth" image="/images/BluetoothIcon.png" type="audio"/>
+            </radiotime>
+            """,
+            )
+        async with Player("node") as client:
+            await client.inputs()
+            now += 31.0
+            await client.inputs()
+
+        assert len(mocked.requests[("GET", URL("http://node:11000/RadioBrowse?service=Capture"))]) == 2